@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import os
+import bisect
 import calendar
 import datetime as dt
 from typing import List, Optional, Dict, Any
@@ -8,6 +9,7 @@ from typing import List, Optional, Dict, Any
 from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy import and_, func
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 
@@ -28,6 +30,99 @@ def cycle_index_for_date(day: dt.date) -> int:
     offset = (first.weekday() + 1) % 7   # Domingo=0 ... Sábado=6
     return ((offset + (day.day - 1)) % 28) + 1
 
+# Effective date for an ingredient's pre-history price, recorded on its first change
+PRICE_HISTORY_START = dt.date.min
+
+def _record_price(db: Session, ing: models.Ingredient):
+    # Append the ingredient's current price (None = price cleared) to its history, effective today
+    db.add(models.IngredientPrice(
+        ingredient_id=ing.id,
+        effective_date=dt.date.today(),
+        unit_price=ing.unit_price,
+        price_currency=ing.price_currency
+    ))
+
+def _backfill_price(db: Session, ing: models.Ingredient, has_history: Optional[bool] = None,
+                    effective: dt.date = PRICE_HISTORY_START) -> Optional[models.IngredientPrice]:
+    """
+    Ingredients that predate price history only carry their cached price. Before the
+    first change, record that price (from PRICE_HISTORY_START by default) so past days keep it.
+    """
+    if ing.unit_price is None:
+        return None
+    if has_history is None:
+        has_history = db.query(models.IngredientPrice.id).filter(
+            models.IngredientPrice.ingredient_id == ing.id
+        ).first() is not None
+    if has_history:
+        return None
+    row = models.IngredientPrice(
+        ingredient_id=ing.id,
+        effective_date=effective,
+        unit_price=ing.unit_price,
+        price_currency=ing.price_currency
+    )
+    db.add(row)
+    return row
+
+def _price_out(row: models.IngredientPrice) -> schemas.IngredientPriceOut:
+    return schemas.IngredientPriceOut(
+        id=row.id,
+        ingredient_id=row.ingredient_id,
+        unit_price=row.unit_price,
+        price_currency=row.price_currency,
+        effective_date=row.effective_date.isoformat(),
+    )
+
+def _group_price_history(rows: List[models.IngredientPrice]) -> Dict[int, tuple]:
+    # rows must be sorted by (effective_date, id) within each ingredient
+    history: Dict[int, tuple] = {}
+    for r in rows:
+        dates, prices = history.setdefault(r.ingredient_id, ([], []))
+        dates.append(r.effective_date)
+        prices.append(r)
+    return history
+
+def _load_price_history(db: Session, start: dt.date, end: dt.date) -> Dict[int, tuple]:
+    """
+    Load every price that can be in effect between start and end in a single query,
+    per ingredient: the latest entry on/before start, all entries in (start, end], and
+    the earliest entry (used for days before an ingredient's history begins).
+    Returns {ingredient_id: ([effective_date, ...], [IngredientPrice, ...])} sorted by date.
+    """
+    Price = models.IngredientPrice
+
+    def edge_rows(agg, *criteria):
+        edge = (
+            db.query(Price.ingredient_id.label("ingredient_id"), agg(Price.effective_date).label("effective_date"))
+            .filter(*criteria)
+            .group_by(Price.ingredient_id)
+            .subquery()
+        )
+        return db.query(Price).join(
+            edge, and_(Price.ingredient_id == edge.c.ingredient_id, Price.effective_date == edge.c.effective_date)
+        )
+
+    in_range = db.query(Price).filter(Price.effective_date > start, Price.effective_date <= end)
+    rows = (
+        edge_rows(func.max, Price.effective_date <= start)
+        .union(edge_rows(func.min), in_range)
+        .order_by(Price.ingredient_id.asc(), Price.effective_date.asc(), Price.id.asc())
+        .all()
+    )
+    return _group_price_history(rows)
+
+def _price_on(history: Dict[int, tuple], ing: models.Ingredient, day: dt.date):
+    # Latest entry effective on/before day (same-day ties: last inserted wins).
+    # Days before the first entry use the earliest known price; ingredients
+    # without any history use the cached current price.
+    dates, prices = history.get(ing.id, ((), ()))
+    if not dates:
+        return ing.unit_price, ing.price_currency
+    pos = bisect.bisect_right(dates, day)
+    p = prices[pos - 1] if pos else prices[0]
+    return p.unit_price, p.price_currency
+
 # --- CORS ---
 origins = os.getenv("ALLOWED_ORIGINS", "*").split(",")
 origins = [o.strip() for o in origins if o.strip()]
@@ -78,6 +173,9 @@ def create_ingredient(body: schemas.IngredientIn, db: Session = Depends(get_db),
         price_currency=body.price_currency
     )
     db.add(ing)
+    db.flush()
+    if ing.unit_price is not None:
+        _record_price(db, ing)
     db.commit()
     db.refresh(ing)
     return ing
@@ -87,10 +185,15 @@ def update_ingredient(ingredient_id: int, body: schemas.IngredientIn, db: Sessio
     ing = db.get(models.Ingredient, ingredient_id)
     if not ing:
         raise HTTPException(status_code=404, detail="Not found")
+    price_changed = (ing.unit_price, ing.price_currency) != (body.unit_price, body.price_currency)
+    if price_changed:
+        _backfill_price(db, ing)
     ing.name = body.name.strip()
     ing.unit = body.unit.strip()
     ing.unit_price = body.unit_price
     ing.price_currency = body.price_currency
+    if price_changed:
+        _record_price(db, ing)
     db.commit()
     db.refresh(ing)
     return ing
@@ -101,10 +204,13 @@ def delete_ingredient(ingredient_id: int, db: Session = Depends(get_db), _=Depen
     if not ing:
         raise HTTPException(status_code=404, detail="Not found")
 
-    # Remove references in dish_ingredients first (safe even if none)
+    # Remove references in dish_ingredients and price history first (safe even if none)
     db.query(models.DishIngredient).filter(models.DishIngredient.ingredient_id == ingredient_id).delete(
         synchronize_session=False
     )
+    db.query(models.IngredientPrice).filter(models.IngredientPrice.ingredient_id == ingredient_id).delete(
+        synchronize_session=False
+    )
 
     db.delete(ing)
     try:
@@ -117,6 +223,85 @@ def delete_ingredient(ingredient_id: int, db: Session = Depends(get_db), _=Depen
         )
     return {"ok": True}
 
+# ---------- Ingredient price history ----------
+@app.get("/api/ingredients/{ingredient_id}/prices", response_model=List[schemas.IngredientPriceOut])
+def list_ingredient_prices(ingredient_id: int, db: Session = Depends(get_db)):
+    ing = db.get(models.Ingredient, ingredient_id)
+    if not ing:
+        raise HTTPException(status_code=404, detail="Ingredient not found")
+    rows = (
+        db.query(models.IngredientPrice)
+        .filter(models.IngredientPrice.ingredient_id == ingredient_id)
+        .order_by(models.IngredientPrice.effective_date.asc(), models.IngredientPrice.id.asc())
+        .all()
+    )
+    return [_price_out(r) for r in rows]
+
+@app.post("/api/ingredients/prices", response_model=List[schemas.IngredientPriceOut])
+def import_ingredient_prices(body: schemas.IngredientPricesImportIn, db: Session = Depends(get_db), _=Depends(require_auth)):
+    ingredients = {i.id: i for i in db.query(models.Ingredient).all()}
+    entries = []
+    for entry in body.items:
+        ing = ingredients.get(entry.ingredient_id)
+        if not ing:
+            raise HTTPException(status_code=400, detail=f"Ingredient id {entry.ingredient_id} not found")
+        try:
+            effective = dt.date.fromisoformat(entry.effective_date)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="effective_date must be YYYY-MM-DD")
+        entries.append((ing, effective, entry))
+
+    # Apply in date order (stable, so same-day entries keep their submitted order)
+    entries.sort(key=lambda e: (e[0].id, e[1]))
+    today = dt.date.today()
+
+    # Full history of the touched ingredients, so duplicates can be skipped
+    touched = {ing.id for ing, _, _ in entries}
+    history = _group_price_history(
+        db.query(models.IngredientPrice)
+        .filter(models.IngredientPrice.ingredient_id.in_(touched))
+        .order_by(models.IngredientPrice.effective_date.asc(), models.IngredientPrice.id.asc())
+        .all()
+    ) if touched else {}
+
+    for ing_id in touched:
+        if ing_id not in history:
+            # The cached price is today's price: keep it in effect today when importing past data
+            earliest = min(effective for ing, effective, _ in entries if ing.id == ing_id)
+            backfill_date = today if earliest < today else PRICE_HISTORY_START
+            row = _backfill_price(db, ingredients[ing_id], has_history=False, effective=backfill_date)
+            history[ing_id] = ([row.effective_date], [row]) if row else ([], [])
+
+    rows: List[models.IngredientPrice] = []
+    for ing, effective, entry in entries:
+        currency = entry.price_currency or ing.price_currency
+        dates, prices = history[ing.id]
+        pos = bisect.bisect_right(dates, effective)
+        if pos and (prices[pos - 1].unit_price, prices[pos - 1].price_currency) == (entry.unit_price, currency):
+            continue  # already the price in effect on that date
+        row = models.IngredientPrice(
+            ingredient_id=ing.id,
+            effective_date=effective,
+            unit_price=entry.unit_price,
+            price_currency=currency
+        )
+        db.add(row)
+        dates.insert(pos, effective)
+        prices.insert(pos, row)
+        rows.append(row)
+    db.flush()
+
+    # Refresh the Ingredient.unit_price cache only where an imported row is now in effect today
+    for ing_id, (dates, prices) in history.items():
+        pos = bisect.bisect_right(dates, today)
+        current = prices[pos - 1] if pos else None
+        if current is not None and current in rows:
+            ingredients[ing_id].unit_price = current.unit_price
+            ingredients[ing_id].price_currency = current.price_currency
+
+    db.commit()
+    return [_price_out(r) for r in rows]
+
 # ---------- Dishes ----------
 @app.get("/api/dishes", response_model=List[schemas.DishOut])
 def list_dishes(db: Session = Depends(get_db)):
@@ -347,6 +532,8 @@ def ensure_cycle(db: Session):
 def shopping(start: str, end: str, db: Session = Depends(get_db)):
     """
     Aggregate ingredient totals from planned meals between start and end inclusive.
+    Each day is costed at the ingredient price in effect on that date; an item's
+    unit_price is the average over the range, and both are None when any day lacks a price.
     start/end: YYYY-MM-DD
     """
     try:
@@ -364,9 +551,10 @@ def shopping(start: str, end: str, db: Session = Depends(get_db)):
     overrides = {o.date: o for o in db.query(models.DayOverride).all()}
     cycle = {c.day_index: c for c in db.query(models.CycleDay).all()}
     ingredients = {i.id: i for i in db.query(models.Ingredient).all()}
+    history = _load_price_history(db, start_d, end_d)
 
-    # Collect dish ids used
-    used_dish_ids: List[int] = []
+    # Collect dish ids used, per day
+    used_dish_ids: List[tuple] = []
     day = start_d
     while day <= end_d:
         ovr = overrides.get(day)
@@ -376,12 +564,12 @@ def shopping(start: str, end: str, db: Session = Depends(get_db)):
             idx = cycle_index_for_date(day)
             c = cycle[idx]
             ids = [c.breakfast_dish_id, c.lunch_dish_id, c.snack_dish_id, c.dinner_dish_id]
-        used_dish_ids.extend([i for i in ids if i])
+        used_dish_ids.extend([(day, i) for i in ids if i])
         day += dt.timedelta(days=1)
 
     # Aggregate ingredients
     totals: Dict[int, Dict[str, Any]] = {}
-    for dish_id in used_dish_ids:
+    for day, dish_id in used_dish_ids:
         dish = dishes.get(dish_id)
         if not dish:
             continue
@@ -390,7 +578,6 @@ def shopping(start: str, end: str, db: Session = Depends(get_db)):
             if not ing:
                 continue
             # Normalize unit: keep di.unit
-            key = (ing.id, di.unit)
             k = f"{ing.id}::{di.unit}"
             if k not in totals:
                 totals[k] = {
@@ -398,27 +585,39 @@ def shopping(start: str, end: str, db: Session = Depends(get_db)):
                     "ingredient_name": ing.name,
                     "unit": di.unit,
                     "amount": 0.0,
-                    "unit_price": ing.unit_price,
-                    "price_currency": ing.price_currency,
+                    "price_currency": None,
+                    "cost": 0.0,
                 }
-            totals[k]["amount"] += float(di.amount)
+            t = totals[k]
+            t["amount"] += float(di.amount)
+            unit_price, price_currency = _price_on(history, ing, day)
+            # An item is only costed if every day has a price in a single currency
+            if t["cost"] is None:
+                continue
+            if unit_price is None or (t["price_currency"] or price_currency) != price_currency:
+                t["cost"] = None
+                continue
+            t["price_currency"] = price_currency
+            t["cost"] += float(di.amount) * float(unit_price)
 
     items: List[schemas.ShoppingItemOut] = []
     grand_total = 0.0
     currency = None
     for v in sorted(totals.values(), key=lambda x: (x["ingredient_name"], x["unit"])):
-        cost = None
-        if v["unit_price"] is not None:
-            cost = v["amount"] * float(v["unit_price"])
+        cost = v["cost"]
+        unit_price = None
+        if cost is not None:
             grand_total += cost
             currency = currency or v["price_currency"]
+            # Average over the range, so estimated_cost == amount * unit_price
+            unit_price = cost / v["amount"] if v["amount"] else None
         items.append(schemas.ShoppingItemOut(
             ingredient_id=v["ingredient_id"],
             ingredient_name=v["ingredient_name"],
             unit=v["unit"],
             amount=v["amount"],
-            unit_price=v["unit_price"],
-            price_currency=v["price_currency"],
+            unit_price=unit_price,
+            price_currency=v["price_currency"] or ingredients[v["ingredient_id"]].price_currency,
             estimated_cost=cost
         ))
 
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import datetime as dt
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, Date, UniqueConstraint, Text
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Date, UniqueConstraint, Text, Index
 from sqlalchemy.orm import relationship
 
 from .db import Base
@@ -14,6 +14,19 @@ class Ingredient(Base):
     unit_price = Column(Float, nullable=True)
     price_currency = Column(String(8), nullable=False, default="BRL")
 
+class IngredientPrice(Base):
+    # Append-only: a new row per price change, never updated in place
+    __tablename__ = "ingredient_prices"
+    id = Column(Integer, primary_key=True, index=True)
+    ingredient_id = Column(Integer, ForeignKey("ingredients.id", ondelete="CASCADE"), nullable=False)
+    effective_date = Column(Date, nullable=False, index=True)
+    unit_price = Column(Float, nullable=True)  # None = price cleared from that date
+    price_currency = Column(String(8), nullable=False, default="BRL")
+
+    __table_args__ = (
+        Index("ix_ingredient_prices_ing_date", "ingredient_id", "effective_date"),
+    )
+
 class Dish(Base):
     __tablename__ = "dishes"
     id = Column(Integer, primary_key=True, index=True)
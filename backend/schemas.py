@@ -22,6 +22,22 @@ class IngredientOut(IngredientIn):
     class Config:
         from_attributes = True
 
+class IngredientPriceIn(BaseModel):
+    ingredient_id: int
+    unit_price: float = Field(ge=0)
+    price_currency: Optional[str] = None  # defaults to the ingredient's currency
+    effective_date: str  # YYYY-MM-DD
+
+class IngredientPricesImportIn(BaseModel):
+    items: List[IngredientPriceIn] = []
+
+class IngredientPriceOut(BaseModel):
+    id: int
+    ingredient_id: int
+    unit_price: Optional[float] = None
+    price_currency: str
+    effective_date: str
+
 # --- Dish ---
 class DishIn(BaseModel):
     name: str
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import os
+import tempfile
+
+import pytest
+
+# Must be set before backend.db builds its engine
+_tmpdir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmpdir, 'test.db')}"
+os.environ["MEALPLANNER_PASSWORD"] = "test-password"
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from backend.db import Base, engine, SessionLocal  # noqa: E402
+from backend.main import app  # noqa: E402
+
+
+@pytest.fixture()
+def db():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture()
+def client(db):
+    c = TestClient(app)
+    token = c.post("/api/login", json={"password": "test-password"}).json()["token"]
+    c.headers["Authorization"] = f"Bearer {token}"
+    return c
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import datetime as dt
+
+from backend import models
+
+TODAY = dt.date.today()
+
+
+def _plan_daily(client, ingredient_id: int):
+    # One dish using 1 unit of the ingredient, served at lunch every day
+    dish = client.post("/api/dishes", json={"name": "daily"}).json()
+    client.put(f"/api/dishes/{dish['id']}/ingredients", json={"items": [{"ingredient_id": ingredient_id, "amount": 1}]})
+    for i in range(1, 29):
+        client.put(f"/api/cycle/{i}", json={"lunch_dish_id": dish["id"]})
+
+
+def _ingredient(client, price=None):
+    ing = client.post("/api/ingredients", json={"name": "rice", "unit": "kg", "unit_price": price}).json()
+    _plan_daily(client, ing["id"])
+    return ing
+
+
+def _import(client, *items):
+    return client.post("/api/ingredients/prices", json={"items": list(items)})
+
+
+def _shopping(client, start, end):
+    return client.get(f"/api/shopping?start={start}&end={end}").json()
+
+
+def test_mid_range_price_change(client):
+    ing = _ingredient(client)
+    _import(
+        client,
+        {"ingredient_id": ing["id"], "unit_price": 2, "effective_date": "2025-01-01"},
+        {"ingredient_id": ing["id"], "unit_price": 3, "effective_date": "2025-01-06"},
+    )
+    out = _shopping(client, "2025-01-03", "2025-01-08")
+    item = out["items"][0]
+    assert item["amount"] == 6
+    assert item["estimated_cost"] == 3 * 2 + 3 * 3
+    assert item["unit_price"] == 2.5
+    assert out["estimated_total"] == 15
+
+
+def test_same_day_tie_last_inserted_wins(client):
+    ing = _ingredient(client)
+    _import(
+        client,
+        {"ingredient_id": ing["id"], "unit_price": 2, "effective_date": "2025-01-01"},
+        {"ingredient_id": ing["id"], "unit_price": 4, "effective_date": "2025-01-01"},
+    )
+    assert _shopping(client, "2025-01-01", "2025-01-01")["estimated_total"] == 4
+
+
+def test_range_before_first_entry_uses_earliest_price(client):
+    ing = _ingredient(client)
+    _import(
+        client,
+        {"ingredient_id": ing["id"], "unit_price": 2, "effective_date": "2025-01-01"},
+        {"ingredient_id": ing["id"], "unit_price": 7, "effective_date": "2025-06-01"},
+    )
+    assert _shopping(client, "2024-12-30", "2024-12-31")["estimated_total"] == 4
+    assert _shopping(client, "2024-12-31", "2025-01-01")["estimated_total"] == 4
+
+
+def test_import_validation(client):
+    ing = _ingredient(client)
+    r = _import(client, {"ingredient_id": ing["id"], "unit_price": -3, "effective_date": "2025-01-01"})
+    assert r.status_code == 422
+    r = _import(client, {"ingredient_id": ing["id"], "unit_price": 3, "effective_date": "01/01/2025"})
+    assert r.status_code == 400
+    r = _import(client, {"ingredient_id": 999, "unit_price": 3, "effective_date": "2025-01-01"})
+    assert r.status_code == 400
+    assert client.get(f"/api/ingredients/{ing['id']}/prices").json() == []
+
+
+def test_import_skips_price_already_in_effect(client):
+    ing = _ingredient(client)
+    r = _import(
+        client,
+        {"ingredient_id": ing["id"], "unit_price": 2, "effective_date": "2025-01-01"},
+        {"ingredient_id": ing["id"], "unit_price": 2, "effective_date": "2025-02-01"},
+    )
+    assert len(r.json()) == 1
+    r = _import(client, {"ingredient_id": ing["id"], "unit_price": 2, "effective_date": "2025-03-01"})
+    assert r.json() == []
+    assert len(client.get(f"/api/ingredients/{ing['id']}/prices").json()) == 1
+
+
+def test_preexisting_ingredient_keeps_old_price_for_past_days(client, db):
+    # Ingredient created before price history existed: cached price only
+    ing = models.Ingredient(name="rice", unit="kg", unit_price=5.0, price_currency="BRL")
+    db.add(ing)
+    db.commit()
+    _plan_daily(client, ing.id)
+    yesterday = TODAY - dt.timedelta(days=1)
+
+    r = client.put(f"/api/ingredients/{ing.id}", json={"name": "rice", "unit": "kg", "unit_price": 9.0})
+    assert r.status_code == 200
+    assert _shopping(client, yesterday, yesterday)["estimated_total"] == 5
+    assert _shopping(client, TODAY, TODAY)["estimated_total"] == 9
+
+
+def test_clearing_price_stops_costing(client):
+    ing = _ingredient(client, price=9.0)
+    client.put(f"/api/ingredients/{ing['id']}", json={"name": "rice", "unit": "kg", "unit_price": None})
+    out = _shopping(client, TODAY, TODAY)
+    assert out["items"][0]["estimated_cost"] is None
+    assert out["items"][0]["unit_price"] is None
+    assert out["estimated_total"] == 0
+
+    # An unrelated past import must not bring the cleared price back
+    _import(client, {"ingredient_id": ing["id"], "unit_price": 4, "effective_date": "2025-01-01"})
+    assert client.get("/api/ingredients").json()[0]["unit_price"] is None
+
+
+def test_import_refreshes_current_price(client):
+    ing = _ingredient(client, price=9.0)
+    tomorrow = TODAY + dt.timedelta(days=1)
+    _import(client, {"ingredient_id": ing["id"], "unit_price": 11, "effective_date": tomorrow.isoformat()})
+    assert client.get("/api/ingredients").json()[0]["unit_price"] == 9
+    _import(client, {"ingredient_id": ing["id"], "unit_price": 10, "effective_date": TODAY.isoformat()})
+    assert client.get("/api/ingredients").json()[0]["unit_price"] == 10
+
+
+def test_partially_priced_item_has_no_cost(client):
+    ing = _ingredient(client)
+    _import(client, {"ingredient_id": ing["id"], "unit_price": 2, "effective_date": "2025-01-01"})
+    client.put(f"/api/ingredients/{ing['id']}", json={"name": "rice", "unit": "kg", "unit_price": None})
+    yesterday = TODAY - dt.timedelta(days=1)
+    item = _shopping(client, yesterday, TODAY)["items"][0]
+    assert item["amount"] == 2
+    assert item["estimated_cost"] is None
+
+
+def test_import_out_of_order_batch(client):
+    ing = _ingredient(client)
+    _import(
+        client,
+        {"ingredient_id": ing["id"], "unit_price": 2, "effective_date": "2025-01-01"},
+        {"ingredient_id": ing["id"], "unit_price": 2, "effective_date": "2025-02-01"},
+        {"ingredient_id": ing["id"], "unit_price": 3, "effective_date": "2025-01-15"},
+    )
+    assert _shopping(client, "2025-01-20", "2025-01-20")["estimated_total"] == 3
+    assert _shopping(client, "2025-02-10", "2025-02-10")["estimated_total"] == 2
+
+
+def test_historical_import_keeps_preexisting_price_today(client, db):
+    ing = models.Ingredient(name="rice", unit="kg", unit_price=9.0, price_currency="BRL")
+    db.add(ing)
+    db.commit()
+    _plan_daily(client, ing.id)
+
+    _import(client, {"ingredient_id": ing.id, "unit_price": 2, "effective_date": "2025-01-01"})
+    assert client.get("/api/ingredients").json()[0]["unit_price"] == 9
+    assert _shopping(client, TODAY, TODAY)["estimated_total"] == 9
+    assert _shopping(client, "2025-01-02", "2025-01-02")["estimated_total"] == 2
+
+
+def test_mixed_currency_item_has_no_cost(client):
+    ing = _ingredient(client, price=9.0)
+    client.put(f"/api/ingredients/{ing['id']}", json={"name": "rice", "unit": "kg", "unit_price": 9.0, "price_currency": "USD"})
+    yesterday = TODAY - dt.timedelta(days=1)
+    item = _shopping(client, yesterday, TODAY)["items"][0]
+    assert item["estimated_cost"] is None
+    assert item["unit_price"] is None